@@ -30,11 +30,13 @@ def images(context):
 
 @sensor(job=images_job)
 def image_sensor(context):
-    new_images = [
-        img_filename
-        for img_filename in os.listdir(os.getenv("MY_DIRECTORY"))
-        if not images_partitions_def.has_partition(img_filename, context.instance)
-    ]
+    existing_images = set(
+        images_partitions_def.get_partition_keys(dynamic_partitions_store=context.instance)
+    )
+    with os.scandir(os.getenv("MY_DIRECTORY")) as img_files:
+        new_images = [
+            img_file.name for img_file in img_files if img_file.name not in existing_images
+        ]
 
     images_partitions_def.add_partitions(new_images, context.instance)
 
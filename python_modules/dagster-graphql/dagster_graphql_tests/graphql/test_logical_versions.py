@@ -1,5 +1,7 @@
+from functools import lru_cache
 from typing import Any, Mapping, Optional, Sequence
 
+import pytest
 from dagster import (
     AssetIn,
     DailyPartitionsDefinition,
@@ -22,6 +24,18 @@
 from dagster_graphql_tests.graphql.test_assets import GET_ASSET_LOGICAL_VERSIONS
 
 
+@pytest.fixture(scope="module")
+def shared_instance():
+    with instance_for_test() as instance:
+        yield instance
+
+
+@pytest.fixture(name="instance")
+def instance_fixture(shared_instance):
+    yield shared_instance
+    shared_instance.wipe()
+
+
 def get_repo_v1():
     @asset
     def foo():
@@ -50,56 +64,54 @@ def repo():
     return repo
 
 
-def test_dependencies_changed():
+def test_dependencies_changed(instance):
     repo_v1 = get_repo_v1()
     repo_v2 = get_repo_v2()
 
-    with instance_for_test() as instance:
-        with define_out_of_process_context(__file__, "get_repo_v1", instance) as context_v1:
-            assert _materialize_assets(context_v1, repo_v1)
-            wait_for_runs_to_finish(context_v1.instance)
-        with define_out_of_process_context(__file__, "get_repo_v2", instance) as context_v2:
-            assert _fetch_logical_versions(context_v2, repo_v2)
+    with define_out_of_process_context(__file__, "get_repo_v1", instance) as context_v1:
+        assert _materialize_assets(context_v1, repo_v1)
+        wait_for_runs_to_finish(context_v1.instance)
+    with define_out_of_process_context(__file__, "get_repo_v2", instance) as context_v2:
+        assert _fetch_logical_versions(context_v2, repo_v2)
 
 
-def test_stale_status():
+def test_stale_status(instance):
     repo = get_repo_v1()
 
-    with instance_for_test() as instance:
-        with define_out_of_process_context(__file__, "get_repo_v1", instance) as context:
-            result = _fetch_logical_versions(context, repo)
-            foo = _get_asset_node("foo", result)
-            assert foo["currentLogicalVersion"] is None
-            assert foo["staleStatus"] == "MISSING"
-            assert foo["staleStatusCauses"] == [
-                {
-                    "status": "MISSING",
-                    "reason": "never materialized",
-                    "key": {"path": ["foo"]},
-                    "dependency": None,
-                }
-            ]
-
-            assert _materialize_assets(context, repo)
-            wait_for_runs_to_finish(context.instance)
-
-            result = _fetch_logical_versions(context, repo)
-            foo = _get_asset_node("foo", result)
-            assert foo["currentLogicalVersion"] is not None
-            assert foo["staleStatus"] == "FRESH"
-            assert foo["staleStatusCauses"] == []
-
-
-def test_logical_version_from_tags():
+    with define_out_of_process_context(__file__, "get_repo_v1", instance) as context:
+        result = _fetch_logical_versions(context, repo)
+        foo = _get_asset_nodes_by_key(result)["foo"]
+        assert foo["currentLogicalVersion"] is None
+        assert foo["staleStatus"] == "MISSING"
+        assert foo["staleStatusCauses"] == [
+            {
+                "status": "MISSING",
+                "reason": "never materialized",
+                "key": {"path": ["foo"]},
+                "dependency": None,
+            }
+        ]
+
+        assert _materialize_assets(context, repo)
+        wait_for_runs_to_finish(context.instance)
+
+        result = _fetch_logical_versions(context, repo)
+        foo = _get_asset_nodes_by_key(result)["foo"]
+        assert foo["currentLogicalVersion"] is not None
+        assert foo["staleStatus"] == "FRESH"
+        assert foo["staleStatusCauses"] == []
+
+
+def test_logical_version_from_tags(instance):
     repo_v1 = get_repo_v1()
-    with instance_for_test() as instance:
-        with define_out_of_process_context(__file__, "get_repo_v1", instance) as context_v1:
-            assert _materialize_assets(context_v1, repo_v1)
-            wait_for_runs_to_finish(context_v1.instance)
-            result = _fetch_logical_versions(context_v1, repo_v1)
-            tags = result.data["assetNodes"][0]["assetMaterializations"][0]["tags"]
-            lv_tag = next(tag for tag in tags if tag["key"] == LOGICAL_VERSION_TAG_KEY)
-            assert lv_tag["value"] == result.data["assetNodes"][0]["currentLogicalVersion"]
+    with define_out_of_process_context(__file__, "get_repo_v1", instance) as context_v1:
+        assert _materialize_assets(context_v1, repo_v1)
+        wait_for_runs_to_finish(context_v1.instance)
+        result = _fetch_logical_versions(context_v1, repo_v1)
+        node = result.data["assetNodes"][0]
+        tags = node["assetMaterializations"][0]["tags"]
+        tag_map = {tag["key"]: tag["value"] for tag in tags}
+        assert tag_map[LOGICAL_VERSION_TAG_KEY] == node["currentLogicalVersion"]
 
 
 def get_repo_with_partitioned_self_dep_asset():
@@ -125,18 +137,18 @@ def repo():
     return repo
 
 
-def test_partitioned_self_dep():
+def test_partitioned_self_dep(instance):
     repo = get_repo_with_partitioned_self_dep_asset()
 
-    with instance_for_test() as instance:
-        with define_out_of_process_context(
-            __file__, "get_repo_with_partitioned_self_dep_asset", instance
-        ) as context:
-            result = _fetch_logical_versions(context, repo)
-            assert result
-            assert result.data
-            assert _get_asset_node("a", result)["projectedLogicalVersion"] is None
-            assert _get_asset_node("b", result)["projectedLogicalVersion"] is None
+    with define_out_of_process_context(
+        __file__, "get_repo_with_partitioned_self_dep_asset", instance
+    ) as context:
+        result = _fetch_logical_versions(context, repo)
+        assert result
+        assert result.data
+        nodes = _get_asset_nodes_by_key(result)
+        assert nodes["a"]["projectedLogicalVersion"] is None
+        assert nodes["b"]["projectedLogicalVersion"] is None
 
 
 def _materialize_assets(
@@ -145,7 +157,7 @@ def _materialize_assets(
     asset_selection: Optional[Sequence[AssetKey]] = None,
 ):
     selector = infer_job_or_pipeline_selector(
-        context, repo.get_implicit_asset_job_names()[0], asset_selection=asset_selection
+        context, _get_implicit_asset_job_name(repo), asset_selection=asset_selection
     )
     return execute_dagster_graphql(
         context,
@@ -159,7 +171,7 @@ def _materialize_assets(
 
 
 def _fetch_logical_versions(context: WorkspaceRequestContext, repo: RepositoryDefinition):
-    selector = infer_job_or_pipeline_selector(context, repo.get_implicit_asset_job_names()[0])
+    selector = infer_job_or_pipeline_selector(context, _get_implicit_asset_job_name(repo))
     return execute_dagster_graphql(
         context,
         GET_ASSET_LOGICAL_VERSIONS,
@@ -169,5 +181,13 @@ def _fetch_logical_versions(context: WorkspaceRequestContext, repo: RepositoryDe
     )
 
 
-def _get_asset_node(key: str, result: Any) -> Mapping[str, Any]:
-    return next((node for node in result.data["assetNodes"] if node["assetKey"]["path"] == [key]))
+@lru_cache(maxsize=None)
+def _get_implicit_asset_job_name(repo: RepositoryDefinition) -> str:
+    return repo.get_implicit_asset_job_names()[0]
+
+
+def _get_asset_nodes_by_key(result: Any) -> Mapping[str, Mapping[str, Any]]:
+    return {
+        AssetKey(node["assetKey"]["path"]).to_user_string(): node
+        for node in result.data["assetNodes"]
+    }
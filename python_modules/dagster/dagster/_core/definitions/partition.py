@@ -695,6 +695,26 @@ def get_partitions(
             )
             return [Partition(key) for key in partitions]
 
+    def get_partition(
+        self,
+        partition_key: str,
+        current_time: Optional[datetime] = None,
+        dynamic_partitions_store: Optional[DynamicPartitionsStore] = None,
+    ) -> Partition:
+        # Look up the single key on the instance rather than loading every partition
+        if not self.partition_fn and isinstance(dynamic_partitions_store, DagsterInstance):
+            if not self.has_partition(partition_key, dynamic_partitions_store):
+                raise DagsterUnknownPartitionError(
+                    f"Could not find a partition with key `{partition_key}`"
+                )
+            return Partition(partition_key)
+
+        return super().get_partition(
+            partition_key,
+            current_time=current_time,
+            dynamic_partitions_store=dynamic_partitions_store,
+        )
+
     def add_partitions(self, partition_keys: Sequence[str], instance: DagsterInstance) -> None:
         """
         Add partitions to the specified partition definition.
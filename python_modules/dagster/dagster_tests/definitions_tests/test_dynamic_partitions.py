@@ -5,14 +5,17 @@
 from dagster import (
     AssetKey,
     DagsterUnknownPartitionError,
+    Definitions,
     IOManager,
     asset,
+    define_asset_job,
     materialize,
     materialize_to_memory,
 )
 from dagster._check import CheckError
 from dagster._core.definitions.partition import DynamicPartitionsDefinition, Partition
 from dagster._core.test_utils import instance_for_test
+from dagster._utils.caching_instance_queryer import CachingInstanceQueryer
 
 
 @pytest.mark.parametrize(
@@ -66,6 +69,43 @@ def test_dynamic_partitions_def_methods():
         assert foo.has_partition("a", instance=instance) is False
 
 
+def test_dynamic_partitions_get_partition(monkeypatch):
+    foo = DynamicPartitionsDefinition(name="foo")
+
+    @asset(partitions_def=foo)
+    def foo_asset():
+        return 1
+
+    foo_job = Definitions(
+        assets=[foo_asset], jobs=[define_asset_job("foo_job", partitions_def=foo)]
+    ).get_job_def("foo_job")
+
+    def _raise_on_full_fetch(partitions_def_name):
+        raise Exception("Single key lookups should not fetch every partition")
+
+    with instance_for_test() as instance:
+        foo.add_partitions(["a", "b"], instance=instance)
+
+        # Single key lookups against the instance should not load every partition
+        with monkeypatch.context() as m:
+            m.setattr(instance, "get_dynamic_partitions", _raise_on_full_fetch)
+            assert foo.get_partition("a", dynamic_partitions_store=instance).name == "a"
+            assert foo_job.run_request_for_partition("b", instance=instance).partition_key == "b"
+
+            with pytest.raises(DagsterUnknownPartitionError):
+                foo.get_partition("c", dynamic_partitions_store=instance)
+
+        # Other stores fall back to looking the key up among all partitions
+        queryer = CachingInstanceQueryer(instance)
+        assert foo.get_partition("a", dynamic_partitions_store=queryer).name == "a"
+        with pytest.raises(DagsterUnknownPartitionError):
+            foo.get_partition("c", dynamic_partitions_store=queryer)
+
+        foo.delete_partition("a", instance=instance)
+        with pytest.raises(DagsterUnknownPartitionError):
+            foo.get_partition("a", dynamic_partitions_store=instance)
+
+
 def test_dynamic_partitioned_run():
     with instance_for_test() as instance:
         partitions_def = DynamicPartitionsDefinition(name="foo")
@@ -1,16 +1,24 @@
 # pylint: disable=unused-argument
 
-from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union, cast, overload
-
+import itertools
+from collections import defaultdict
+from functools import lru_cache
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union, overload
+from weakref import WeakKeyDictionary
+
+import dagster._check as check
+import pytest
 from dagster import (
     AssetMaterialization,
     AssetsDefinition,
     DagsterInstance,
+    Definitions,
     IOManager,
+    JobDefinition,
     SourceAsset,
     asset,
+    define_asset_job,
     io_manager,
-    materialize,
     observable_source_asset,
 )
 from dagster._config.field import Field
@@ -40,12 +48,17 @@
 # ########################
 
 
+@lru_cache(maxsize=None)
+def _str_to_asset_key(key: str) -> AssetKey:
+    return AssetKey([key])
+
+
 class MaterializationTable:
     def __init__(self, materializations: Mapping[AssetKey, AssetMaterialization]):
         self.materializations = materializations
 
     def __getitem__(self, key: Union[str, AssetKey]) -> AssetMaterialization:
-        asset_key = AssetKey([key]) if isinstance(key, str) else key
+        asset_key = _str_to_asset_key(key) if isinstance(key, str) else key
         return self.materializations[asset_key]
 
 
@@ -64,27 +77,41 @@ def mock_io_manager():
 
 
 def get_mat_from_result(result: ExecuteInProcessResult, node_str: str) -> AssetMaterialization:
-    mats = result.asset_materializations_for_node(node_str)
-    assert all(isinstance(m, AssetMaterialization) for m in mats)
-    return cast(AssetMaterialization, mats[0])
+    mat = result.asset_materializations_for_node(node_str)[0]
+    assert isinstance(mat, AssetMaterialization)
+    return mat
 
 
 def get_mats_from_result(
     result: ExecuteInProcessResult, assets: Sequence[AssetsDefinition]
 ) -> MaterializationTable:
+    # Group materializations by top-level node in a single pass over the run's events
+    mats_by_node: Dict[str, List[AssetMaterialization]] = defaultdict(list)
+    for event in result.all_events:
+        if event.is_step_materialization:
+            node_name = check.not_none(event.solid_handle).root.name
+            mat = event.step_materialization_data.materialization
+            assert isinstance(mat, AssetMaterialization)
+            mats_by_node[node_name].append(mat)
+
     mats: Dict[AssetKey, AssetMaterialization] = {}
     for asset_def in assets:
         node_str = asset_def.node_def.name if asset_def.node_def else asset_def.key.path[-1]
-        for mat in result.asset_materializations_for_node(node_str):
-            mats[mat.asset_key] = cast(AssetMaterialization, mat)
+        for mat in mats_by_node[node_str]:
+            mats[mat.asset_key] = mat
     return MaterializationTable(mats)
 
 
+@lru_cache(maxsize=None)
+def _input_logical_version_tag_key(upstream_asset_key: AssetKey) -> str:
+    return f"{INPUT_LOGICAL_VERSION_TAG_KEY_PREFIX}/{upstream_asset_key.to_user_string()}"
+
+
 def get_upstream_version_from_mat_provenance(
     mat: AssetMaterialization, upstream_asset_key: AssetKey
 ) -> str:
     assert mat.tags
-    return mat.tags[f"{INPUT_LOGICAL_VERSION_TAG_KEY_PREFIX}/{upstream_asset_key.to_user_string()}"]
+    return mat.tags[_input_logical_version_tag_key(upstream_asset_key)]
 
 
 def get_version_from_mat(mat: AssetMaterialization) -> str:
@@ -106,20 +133,24 @@ def assert_code_version(mat: AssetMaterialization, version: str) -> None:
 def assert_same_versions(
     mat1: AssetMaterialization, mat2: AssetMaterialization, code_version: str
 ) -> None:
-    assert mat1.tags
-    assert mat1.tags[CODE_VERSION_TAG_KEY] == code_version
-    assert mat1.tags[LOGICAL_VERSION_TAG_KEY] is not None
-    assert mat2.tags
-    assert mat2.tags[CODE_VERSION_TAG_KEY] == code_version
-    assert mat2.tags[LOGICAL_VERSION_TAG_KEY] == mat1.tags["dagster/logical_version"]
+    tags1, tags2 = mat1.tags, mat2.tags
+    assert tags1
+    assert tags2
+    logical_version = tags1[LOGICAL_VERSION_TAG_KEY]
+    assert tags1[CODE_VERSION_TAG_KEY] == code_version
+    assert logical_version is not None
+    assert tags2[CODE_VERSION_TAG_KEY] == code_version
+    assert tags2[LOGICAL_VERSION_TAG_KEY] == logical_version
 
 
 def assert_different_versions(mat1: AssetMaterialization, mat2: AssetMaterialization) -> None:
-    assert mat1.tags
-    assert mat1.tags[CODE_VERSION_TAG_KEY] is not None
-    assert mat1.tags[LOGICAL_VERSION_TAG_KEY] is not None
-    assert mat2.tags
-    assert mat2.tags[LOGICAL_VERSION_TAG_KEY] != mat1.tags["dagster/logical_version"]
+    tags1, tags2 = mat1.tags, mat2.tags
+    assert tags1
+    assert tags2
+    logical_version = tags1[LOGICAL_VERSION_TAG_KEY]
+    assert tags1[CODE_VERSION_TAG_KEY] is not None
+    assert logical_version is not None
+    assert tags2[LOGICAL_VERSION_TAG_KEY] != logical_version
 
 
 def assert_provenance_match(mat: AssetMaterialization, upstream_mat: AssetMaterialization) -> None:
@@ -137,6 +168,49 @@ def assert_provenance_no_match(
     assert mat_prov_lv != upstream_mat_lv
 
 
+_SOURCE_ASSET_CACHE: "WeakKeyDictionary[AssetsDefinition, SourceAsset]" = WeakKeyDictionary()
+
+
+def get_source_asset(asset_def: AssetsDefinition) -> SourceAsset:
+    if asset_def not in _SOURCE_ASSET_CACHE:
+        _SOURCE_ASSET_CACHE[asset_def] = asset_def.to_source_assets()[0]
+    return _SOURCE_ASSET_CACHE[asset_def]
+
+
+# Replaces every asset except `asset_to_materialize` with its source asset representation
+def get_assets_with_sources(
+    all_assets: Sequence[Union[AssetsDefinition, SourceAsset]],
+    asset_to_materialize: AssetsDefinition,
+) -> Sequence[Union[AssetsDefinition, SourceAsset]]:
+    return [
+        get_source_asset(asset_def)
+        if isinstance(asset_def, AssetsDefinition) and asset_def is not asset_to_materialize
+        else asset_def
+        for asset_def in all_assets
+    ]
+
+
+# Jobs are keyed by the ids of the assets they were built from. A tuple of the assets is stored
+# alongside the job so that their ids cannot be reused by other objects while the entry exists. The
+# instance fixtures clear the cache after each test.
+_MATERIALIZE_JOB_CACHE: Dict[
+    Tuple[int, ...], Tuple[Tuple[Union[AssetsDefinition, SourceAsset], ...], JobDefinition]
+] = {}
+
+
+# Equivalent to the job `materialize` builds, but built only once per asset list
+def get_materialize_job(assets: Sequence[Union[AssetsDefinition, SourceAsset]]) -> JobDefinition:
+    key = tuple(id(asset_def) for asset_def in assets)
+    if key not in _MATERIALIZE_JOB_CACHE:
+        defs = Definitions(
+            jobs=[define_asset_job(name="__ephemeral_asset_job__")],
+            assets=assets,
+            resources={"io_manager": mock_io_manager},
+        )
+        _MATERIALIZE_JOB_CACHE[key] = (tuple(assets), defs.get_job_def("__ephemeral_asset_job__"))
+    return _MATERIALIZE_JOB_CACHE[key][1]
+
+
 @overload
 def materialize_asset(
     all_assets: Sequence[Union[AssetsDefinition, SourceAsset]],
@@ -173,23 +247,9 @@ def materialize_asset(
     partition_key: Optional[str] = None,
     run_config: Optional[Mapping[str, Any]] = None,
 ) -> Union[AssetMaterialization, MaterializationTable]:
-    assets: List[Union[AssetsDefinition, SourceAsset]] = []
-    for asset_def in all_assets:
-        if isinstance(asset_def, SourceAsset):
-            assets.append(asset_def)
-        else:
-            assert isinstance(asset_def, AssetsDefinition)
-            if asset_def == asset_to_materialize:
-                assets.append(asset_def)
-            else:
-                assets.append(asset_def.to_source_assets()[0])
-
-    result = materialize(
-        assets,
-        instance=instance,
-        resources={"io_manager": mock_io_manager},
-        partition_key=partition_key,
-        run_config=run_config,
+    assets = get_assets_with_sources(all_assets, asset_to_materialize)
+    result = get_materialize_job(assets).execute_in_process(
+        instance=instance, partition_key=partition_key, run_config=run_config
     )
     if is_multi:
         return get_mats_from_result(result, [asset_to_materialize])
@@ -204,12 +264,8 @@ def materialize_assets(
     partition_key: Optional[str] = None,
     run_config: Optional[Mapping[str, Any]] = None,
 ) -> MaterializationTable:
-    result = materialize(
-        assets,
-        instance=instance,
-        resources={"io_manager": mock_io_manager},
-        partition_key=partition_key,
-        run_config=run_config,
+    result = get_materialize_job(assets).execute_in_process(
+        instance=instance, partition_key=partition_key, run_config=run_config
     )
     return get_mats_from_result(result, assets)
 
@@ -224,11 +280,99 @@ def materialize_twice(
     return mat1, mat2
 
 
-def get_stale_status_resolver(instance, assets) -> CachingStaleStatusResolver:
-    return CachingStaleStatusResolver(
-        instance=instance,
-        asset_graph=AssetGraph.from_assets(assets),
-    )
+def get_stale_status_resolver(instance, asset_graph: AssetGraph) -> CachingStaleStatusResolver:
+    return CachingStaleStatusResolver(instance=instance, asset_graph=asset_graph)
+
+
+# ########################
+# ##### ASSETS
+# ########################
+
+# Assets with fixed definitions are defined once here. Assets whose definitions vary between tests
+# (e.g. by code version or closed-over state) are defined in the test body.
+
+
+@asset
+def start():
+    return 1
+
+
+@multi_asset(
+    outs={
+        "a": AssetOut(is_required=False),
+        "b": AssetOut(is_required=False),
+        "c": AssetOut(is_required=False),
+    },
+    internal_asset_deps={
+        "a": {AssetKey("start")},
+        "b": {AssetKey("a")},
+        "c": {AssetKey("a")},
+    },
+    can_subset=True,
+)
+def abc_(context, start):  # pylint: disable=redefined-outer-name
+    a = (start + 1) if start else 1
+    b = a + 1
+    c = a + 2
+    out_values = {"a": a, "b": b, "c": c}
+    outputs_to_return = sorted(context.selected_output_names)
+    for output_name in outputs_to_return:
+        yield Output(out_values[output_name], output_name)
+
+
+@multi_asset(
+    outs={
+        "alpha": AssetOut(code_version="a"),
+        "beta": AssetOut(code_version="b"),
+    }
+)
+def alpha_beta():
+    yield Output(1, "alpha")
+    yield Output(2, "beta")
+
+
+# ########################
+# ##### FIXTURES
+# ########################
+
+
+@pytest.fixture(name="ephemeral_instance", scope="module")
+def ephemeral_instance_fixture():
+    with DagsterInstance.ephemeral() as instance:
+        yield instance
+
+
+# Tests reuse asset keys, so the shared instance is wiped after each test to keep them independent
+@pytest.fixture(name="instance")
+def instance_fixture(ephemeral_instance):
+    yield ephemeral_instance
+    ephemeral_instance.wipe()
+    _MATERIALIZE_JOB_CACHE.clear()
+
+
+@pytest.fixture(name="shared_persistent_instance", scope="module")
+def shared_persistent_instance_fixture():
+    with instance_for_test() as instance:
+        yield instance
+
+
+@pytest.fixture(name="persistent_instance")
+def persistent_instance_fixture(shared_persistent_instance):
+    yield shared_persistent_instance
+    shared_persistent_instance.wipe()
+    _MATERIALIZE_JOB_CACHE.clear()
+
+
+# Observable source asset that reports a new logical version each time it is observed
+@pytest.fixture(name="source1")
+def source1_fixture():
+    versions = itertools.count(1)
+
+    @observable_source_asset
+    def source1(_context):
+        return LogicalVersion(str(next(versions)))
+
+    yield source1
 
 
 # ########################
@@ -236,65 +380,58 @@ def get_stale_status_resolver(instance, assets) -> CachingStaleStatusResolver:
 # ########################
 
 
-def test_single_asset():
+def test_single_asset(instance):
     @asset
     def asset1():
         ...
 
-    instance = DagsterInstance.ephemeral()
     mat1, mat2 = materialize_twice([asset1], asset1, instance)
     assert_different_versions(mat1, mat2)
 
 
-def test_single_versioned_asset():
+def test_single_versioned_asset(instance):
     @asset(code_version="abc")
     def asset1():
         ...
 
-    instance = DagsterInstance.ephemeral()
     mat1, mat2 = materialize_twice([asset1], asset1, instance)
     assert_same_versions(mat1, mat2, "abc")
 
 
-def test_source_asset_non_versioned_asset():
+def test_source_asset_non_versioned_asset(instance):
     source1 = SourceAsset("source1")
 
     @asset
     def asset1(source1):
         ...
 
-    instance = DagsterInstance.ephemeral()
     mat1, mat2 = materialize_twice([source1, asset1], asset1, instance)
     assert_different_versions(mat1, mat2)
 
 
-def test_source_asset_versioned_asset():
+def test_source_asset_versioned_asset(instance):
     source1 = SourceAsset("source1")
 
     @asset(code_version="abc")
     def asset1(source1):
         ...
 
-    instance = DagsterInstance.ephemeral()
-
     mat1, mat2 = materialize_twice([source1, asset1], asset1, instance)
     assert_same_versions(mat1, mat2, "abc")
 
 
-def test_source_asset_non_versioned_asset_non_argument_deps():
+def test_source_asset_non_versioned_asset_non_argument_deps(instance):
     source1 = SourceAsset("source1")
 
     @asset(non_argument_deps={"source1"})
     def asset1():
         ...
 
-    instance = DagsterInstance.ephemeral()
-
     mat1, mat2 = materialize_twice([source1, asset1], asset1, instance)
     assert_different_versions(mat1, mat2)
 
 
-def test_versioned_after_unversioned():
+def test_versioned_after_unversioned(instance):
     source1 = SourceAsset("source1")
 
     @asset
@@ -306,8 +443,6 @@ def asset2(asset1):
         ...
 
     all_assets = [source1, asset1, asset2]
-    instance = DagsterInstance.ephemeral()
-
     asset2_mat1 = materialize_assets(all_assets, instance)[asset2.key]
     asset2_mat2 = materialize_asset(all_assets, asset2, instance)
     assert_same_versions(asset2_mat1, asset2_mat2, "abc")
@@ -318,7 +453,7 @@ def asset2(asset1):
     assert_different_versions(asset2_mat2, asset2_mat3)
 
 
-def test_versioned_after_versioned():
+def test_versioned_after_versioned(instance):
     source1 = SourceAsset("source1")
 
     @asset(code_version="abc")
@@ -330,8 +465,6 @@ def asset2(asset1):
         ...
 
     all_assets = [source1, asset1, asset2]
-    instance = DagsterInstance.ephemeral()
-
     asset2_mat1 = materialize_assets(all_assets, instance)[asset2.key]
     asset2_mat2 = materialize_assets(all_assets, instance)[asset2.key]
     asset2_mat3 = materialize_asset(all_assets, asset2, instance)
@@ -340,7 +473,7 @@ def asset2(asset1):
     assert_same_versions(asset2_mat1, asset2_mat3, "xyz")
 
 
-def test_unversioned_after_versioned():
+def test_unversioned_after_versioned(instance):
     source1 = SourceAsset("source1")
 
     @asset(code_version="abc")
@@ -352,42 +485,13 @@ def asset2(asset1):
         ...
 
     all_assets = [source1, asset1, asset2]
-    instance = DagsterInstance.ephemeral()
-
     asset2_mat1 = materialize_assets(all_assets, instance)[asset2.key]
     asset2_mat2 = materialize_asset(all_assets, asset2, instance)
 
     assert_different_versions(asset2_mat1, asset2_mat2)
 
 
-def test_multi_asset():
-    @asset
-    def start():
-        return 1
-
-    @multi_asset(
-        outs={
-            "a": AssetOut(is_required=False),
-            "b": AssetOut(is_required=False),
-            "c": AssetOut(is_required=False),
-        },
-        internal_asset_deps={
-            "a": {AssetKey("start")},
-            "b": {AssetKey("a")},
-            "c": {AssetKey("a")},
-        },
-        can_subset=True,
-    )
-    def abc_(context, start):
-        a = (start + 1) if start else 1
-        b = a + 1
-        c = a + 2
-        out_values = {"a": a, "b": b, "c": c}
-        outputs_to_return = sorted(context.selected_output_names)
-        for output_name in outputs_to_return:
-            yield Output(out_values[output_name], output_name)
-
-    instance = DagsterInstance.ephemeral()
+def test_multi_asset(instance):
     mats_1 = materialize_assets([start, abc_], instance)
     mat_a_1 = mats_1[AssetKey("a")]
     mats_2 = materialize_asset([start, abc_], abc_, instance, is_multi=True)
@@ -397,18 +501,8 @@ def abc_(context, start):
     assert_provenance_no_match(mat_b_2, mat_a_1)
 
 
-def test_multiple_code_versions():
-    @multi_asset(
-        outs={
-            "alpha": AssetOut(code_version="a"),
-            "beta": AssetOut(code_version="b"),
-        }
-    )
-    def alpha_beta():
-        yield Output(1, "alpha")
-        yield Output(2, "beta")
-
-    mats = materialize_assets([alpha_beta], DagsterInstance.ephemeral())
+def test_multiple_code_versions(instance):
+    mats = materialize_assets([alpha_beta], instance)
     alpha_mat = mats[AssetKey("alpha")]
     beta_mat = mats[AssetKey("beta")]
 
@@ -418,9 +512,7 @@ def alpha_beta():
     assert_code_version(beta_mat, "b")
 
 
-def test_set_logical_version_inside_op():
-    instance = DagsterInstance.ephemeral()
-
+def test_set_logical_version_inside_op(instance):
     @asset
     def asset1():
         return Output(1, logical_version=LogicalVersion("foo"))
@@ -429,15 +521,7 @@ def asset1():
     assert_logical_version(mat, LogicalVersion("foo"))
 
 
-def test_stale_status_general() -> None:
-    x = 0
-
-    @observable_source_asset
-    def source1(_context):
-        nonlocal x
-        x = x + 1
-        return LogicalVersion(str(x))
-
+def test_stale_status_general(source1: SourceAsset, persistent_instance) -> None:
     @asset(code_version="abc")
     def asset1(source1):
         ...
@@ -447,71 +531,73 @@ def asset2(asset1):
         ...
 
     all_assets = [source1, asset1, asset2]
-    with instance_for_test() as instance:
-        status_resolver = get_stale_status_resolver(instance, all_assets)
-        assert status_resolver.get_status(source1.key) == StaleStatus.FRESH
-        assert status_resolver.get_status(asset1.key) == StaleStatus.MISSING
-        assert status_resolver.get_status(asset2.key) == StaleStatus.MISSING
-        assert status_resolver.get_status_causes(asset2.key) == [
-            StaleStatusCause(StaleStatus.MISSING, asset2.key, "never materialized")
-        ]
-
-        materialize_assets(all_assets, instance)
-        status_resolver = get_stale_status_resolver(instance, all_assets)
-        assert status_resolver.get_status(asset1.key) == StaleStatus.FRESH
-        assert status_resolver.get_status(asset2.key) == StaleStatus.FRESH
-
-        observe([source1], instance=instance)
-        status_resolver = get_stale_status_resolver(instance, all_assets)
-        assert status_resolver.get_status(asset1.key) == StaleStatus.STALE
-        assert status_resolver.get_status_causes(asset1.key) == [
-            StaleStatusCause(StaleStatus.STALE, asset1.key, "updated input", source1.key),
-        ]
-        assert status_resolver.get_status(asset2.key) == StaleStatus.STALE
-        assert status_resolver.get_status_causes(asset2.key) == [
-            StaleStatusCause(StaleStatus.STALE, asset2.key, "stale input", asset1.key),
-            StaleStatusCause(StaleStatus.STALE, asset1.key, "updated input", source1.key),
-        ]
-        materialize_assets(all_assets, instance)
-
-        # Simulate updating an asset with a new code version
-        @asset(name="asset1", code_version="def")
-        def asset1_v2(source1):
-            ...
-
-        all_assets_v2 = [source1, asset1_v2, asset2]
-
-        status_resolver = get_stale_status_resolver(instance, all_assets_v2)
-        assert status_resolver.get_status(asset1.key) == StaleStatus.STALE
-        assert status_resolver.get_status_causes(asset1.key) == [
-            StaleStatusCause(StaleStatus.STALE, asset1.key, "updated code version"),
-        ]
-        assert status_resolver.get_status(asset2.key) == StaleStatus.STALE
-        assert status_resolver.get_status_causes(asset2.key) == [
-            StaleStatusCause(StaleStatus.STALE, asset2.key, "stale input", asset1.key),
-            StaleStatusCause(StaleStatus.STALE, asset1.key, "updated code version"),
-        ]
-
-        @asset
-        def asset3():
-            ...
-
-        @asset(name="asset2", code_version="xyz")
-        def asset2_v2(asset3):
-            ...
-
-        all_assets_v3 = [source1, asset1_v2, asset2_v2, asset3]
-
-        status_resolver = get_stale_status_resolver(instance, all_assets_v3)
-        assert status_resolver.get_status(asset2.key) == StaleStatus.STALE
-        assert status_resolver.get_status_causes(asset2.key) == [
-            StaleStatusCause(StaleStatus.STALE, asset2.key, "removed input", asset1.key),
-            StaleStatusCause(StaleStatus.STALE, asset2.key, "new input", asset3.key),
-            StaleStatusCause(StaleStatus.MISSING, asset3.key, "never materialized"),
-        ]
-
-
-def test_stale_status_no_code_versions() -> None:
+    asset_graph = AssetGraph.from_assets(all_assets)
+    status_resolver = get_stale_status_resolver(persistent_instance, asset_graph)
+    assert status_resolver.get_status(source1.key) == StaleStatus.FRESH
+    assert status_resolver.get_status(asset1.key) == StaleStatus.MISSING
+    assert status_resolver.get_status(asset2.key) == StaleStatus.MISSING
+    assert status_resolver.get_status_causes(asset2.key) == [
+        StaleStatusCause(StaleStatus.MISSING, asset2.key, "never materialized")
+    ]
+
+    materialize_assets(all_assets, persistent_instance)
+    status_resolver = get_stale_status_resolver(persistent_instance, asset_graph)
+    assert status_resolver.get_status(asset1.key) == StaleStatus.FRESH
+    assert status_resolver.get_status(asset2.key) == StaleStatus.FRESH
+
+    observe([source1], instance=persistent_instance)
+    status_resolver = get_stale_status_resolver(persistent_instance, asset_graph)
+    assert status_resolver.get_status(asset1.key) == StaleStatus.STALE
+    assert status_resolver.get_status_causes(asset1.key) == [
+        StaleStatusCause(StaleStatus.STALE, asset1.key, "updated input", source1.key),
+    ]
+    assert status_resolver.get_status(asset2.key) == StaleStatus.STALE
+    assert status_resolver.get_status_causes(asset2.key) == [
+        StaleStatusCause(StaleStatus.STALE, asset2.key, "stale input", asset1.key),
+        StaleStatusCause(StaleStatus.STALE, asset1.key, "updated input", source1.key),
+    ]
+    materialize_assets(all_assets, persistent_instance)
+
+    # Simulate updating an asset with a new code version
+    @asset(name="asset1", code_version="def")
+    def asset1_v2(source1):
+        ...
+
+    all_assets_v2 = [source1, asset1_v2, asset2]
+    asset_graph_v2 = AssetGraph.from_assets(all_assets_v2)
+
+    status_resolver = get_stale_status_resolver(persistent_instance, asset_graph_v2)
+    assert status_resolver.get_status(asset1.key) == StaleStatus.STALE
+    assert status_resolver.get_status_causes(asset1.key) == [
+        StaleStatusCause(StaleStatus.STALE, asset1.key, "updated code version"),
+    ]
+    assert status_resolver.get_status(asset2.key) == StaleStatus.STALE
+    assert status_resolver.get_status_causes(asset2.key) == [
+        StaleStatusCause(StaleStatus.STALE, asset2.key, "stale input", asset1.key),
+        StaleStatusCause(StaleStatus.STALE, asset1.key, "updated code version"),
+    ]
+
+    @asset
+    def asset3():
+        ...
+
+    @asset(name="asset2", code_version="xyz")
+    def asset2_v2(asset3):
+        ...
+
+    all_assets_v3 = [source1, asset1_v2, asset2_v2, asset3]
+    asset_graph_v3 = AssetGraph.from_assets(all_assets_v3)
+
+    status_resolver = get_stale_status_resolver(persistent_instance, asset_graph_v3)
+    assert status_resolver.get_status(asset2.key) == StaleStatus.STALE
+    assert status_resolver.get_status_causes(asset2.key) == [
+        StaleStatusCause(StaleStatus.STALE, asset2.key, "removed input", asset1.key),
+        StaleStatusCause(StaleStatus.STALE, asset2.key, "new input", asset3.key),
+        StaleStatusCause(StaleStatus.MISSING, asset3.key, "never materialized"),
+    ]
+
+
+def test_stale_status_no_code_versions(persistent_instance) -> None:
     @asset
     def asset1():
         ...
@@ -521,31 +607,31 @@ def asset2(asset1):
         ...
 
     all_assets = [asset1, asset2]
-    with instance_for_test() as instance:
-        status_resolver = get_stale_status_resolver(instance, all_assets)
-        assert status_resolver.get_status(asset1.key) == StaleStatus.MISSING
-        assert status_resolver.get_status(asset2.key) == StaleStatus.MISSING
-
-        materialize_assets(all_assets, instance)
-        status_resolver = get_stale_status_resolver(instance, all_assets)
-        assert status_resolver.get_status(asset1.key) == StaleStatus.FRESH
-        assert status_resolver.get_status(asset2.key) == StaleStatus.FRESH
-
-        materialize_asset(all_assets, asset1, instance)
-        status_resolver = get_stale_status_resolver(instance, all_assets)
-        assert status_resolver.get_status(asset1.key) == StaleStatus.FRESH
-        assert status_resolver.get_status(asset2.key) == StaleStatus.STALE
-        assert status_resolver.get_status_causes(asset2.key) == [
-            StaleStatusCause(StaleStatus.STALE, asset2.key, "updated input", asset1.key),
-        ]
-
-        materialize_asset(all_assets, asset2, instance)
-        status_resolver = get_stale_status_resolver(instance, all_assets)
-        assert status_resolver.get_status(asset1.key) == StaleStatus.FRESH
-        assert status_resolver.get_status(asset2.key) == StaleStatus.FRESH
-
-
-def test_stale_status_redundant_upstream_materialization() -> None:
+    asset_graph = AssetGraph.from_assets(all_assets)
+    status_resolver = get_stale_status_resolver(persistent_instance, asset_graph)
+    assert status_resolver.get_status(asset1.key) == StaleStatus.MISSING
+    assert status_resolver.get_status(asset2.key) == StaleStatus.MISSING
+
+    materialize_assets(all_assets, persistent_instance)
+    status_resolver = get_stale_status_resolver(persistent_instance, asset_graph)
+    assert status_resolver.get_status(asset1.key) == StaleStatus.FRESH
+    assert status_resolver.get_status(asset2.key) == StaleStatus.FRESH
+
+    materialize_asset(all_assets, asset1, persistent_instance)
+    status_resolver = get_stale_status_resolver(persistent_instance, asset_graph)
+    assert status_resolver.get_status(asset1.key) == StaleStatus.FRESH
+    assert status_resolver.get_status(asset2.key) == StaleStatus.STALE
+    assert status_resolver.get_status_causes(asset2.key) == [
+        StaleStatusCause(StaleStatus.STALE, asset2.key, "updated input", asset1.key),
+    ]
+
+    materialize_asset(all_assets, asset2, persistent_instance)
+    status_resolver = get_stale_status_resolver(persistent_instance, asset_graph)
+    assert status_resolver.get_status(asset1.key) == StaleStatus.FRESH
+    assert status_resolver.get_status(asset2.key) == StaleStatus.FRESH
+
+
+def test_stale_status_redundant_upstream_materialization(persistent_instance) -> None:
     @asset(code_version="abc")
     def asset1():
         ...
@@ -555,23 +641,23 @@ def asset2(asset1):
         ...
 
     all_assets = [asset1, asset2]
-    with instance_for_test() as instance:
-        status_resolver = get_stale_status_resolver(instance, all_assets)
-        assert status_resolver.get_status(asset1.key) == StaleStatus.MISSING
-        assert status_resolver.get_status(asset2.key) == StaleStatus.MISSING
+    asset_graph = AssetGraph.from_assets(all_assets)
+    status_resolver = get_stale_status_resolver(persistent_instance, asset_graph)
+    assert status_resolver.get_status(asset1.key) == StaleStatus.MISSING
+    assert status_resolver.get_status(asset2.key) == StaleStatus.MISSING
 
-        materialize_assets(all_assets, instance)
-        status_resolver = get_stale_status_resolver(instance, all_assets)
-        assert status_resolver.get_status(asset1.key) == StaleStatus.FRESH
-        assert status_resolver.get_status(asset2.key) == StaleStatus.FRESH
+    materialize_assets(all_assets, persistent_instance)
+    status_resolver = get_stale_status_resolver(persistent_instance, asset_graph)
+    assert status_resolver.get_status(asset1.key) == StaleStatus.FRESH
+    assert status_resolver.get_status(asset2.key) == StaleStatus.FRESH
 
-        materialize_asset(all_assets, asset1, instance)
-        status_resolver = get_stale_status_resolver(instance, all_assets)
-        assert status_resolver.get_status(asset1.key) == StaleStatus.FRESH
-        assert status_resolver.get_status(asset2.key) == StaleStatus.FRESH
+    materialize_asset(all_assets, asset1, persistent_instance)
+    status_resolver = get_stale_status_resolver(persistent_instance, asset_graph)
+    assert status_resolver.get_status(asset1.key) == StaleStatus.FRESH
+    assert status_resolver.get_status(asset2.key) == StaleStatus.FRESH
 
 
-def test_stale_status_partitioned() -> None:
+def test_stale_status_partitioned(persistent_instance) -> None:
     partitions_def = StaticPartitionsDefinition(["foo"])
 
     @asset(partitions_def=partitions_def)
@@ -587,31 +673,31 @@ def asset3(asset1):
         ...
 
     all_assets = [asset1, asset2, asset3]
-    with instance_for_test() as instance:
-        status_resolver = get_stale_status_resolver(instance, all_assets)
-        assert status_resolver.get_status(asset1.key) == StaleStatus.MISSING
-        assert status_resolver.get_status(asset2.key) == StaleStatus.MISSING
-        assert status_resolver.get_status(asset3.key) == StaleStatus.MISSING
-
-        materialize_assets([asset1, asset2], partition_key="foo", instance=instance)
-        status_resolver = get_stale_status_resolver(instance, all_assets)
-        assert status_resolver.get_status(asset1.key) == StaleStatus.FRESH
-        assert status_resolver.get_status(asset2.key) == StaleStatus.FRESH
-        assert status_resolver.get_status(asset3.key) == StaleStatus.MISSING
-
-        materialize_asset(all_assets, asset3, instance)
-        status_resolver = get_stale_status_resolver(instance, all_assets)
-        assert status_resolver.get_status(asset3.key) == StaleStatus.FRESH
-
-        # Downstream values are not stale even after upstream changed
-        materialize_asset(all_assets, asset1, instance, partition_key="foo")
-        status_resolver = get_stale_status_resolver(instance, all_assets)
-        assert status_resolver.get_status(asset1.key) == StaleStatus.FRESH
-        assert status_resolver.get_status(asset2.key) == StaleStatus.FRESH
-        assert status_resolver.get_status(asset3.key) == StaleStatus.FRESH
-
-
-def test_stale_status_manually_versioned() -> None:
+    asset_graph = AssetGraph.from_assets(all_assets)
+    status_resolver = get_stale_status_resolver(persistent_instance, asset_graph)
+    assert status_resolver.get_status(asset1.key) == StaleStatus.MISSING
+    assert status_resolver.get_status(asset2.key) == StaleStatus.MISSING
+    assert status_resolver.get_status(asset3.key) == StaleStatus.MISSING
+
+    materialize_assets([asset1, asset2], partition_key="foo", instance=persistent_instance)
+    status_resolver = get_stale_status_resolver(persistent_instance, asset_graph)
+    assert status_resolver.get_status(asset1.key) == StaleStatus.FRESH
+    assert status_resolver.get_status(asset2.key) == StaleStatus.FRESH
+    assert status_resolver.get_status(asset3.key) == StaleStatus.MISSING
+
+    materialize_asset(all_assets, asset3, persistent_instance)
+    status_resolver = get_stale_status_resolver(persistent_instance, asset_graph)
+    assert status_resolver.get_status(asset3.key) == StaleStatus.FRESH
+
+    # Downstream values are not stale even after upstream changed
+    materialize_asset(all_assets, asset1, persistent_instance, partition_key="foo")
+    status_resolver = get_stale_status_resolver(persistent_instance, asset_graph)
+    assert status_resolver.get_status(asset1.key) == StaleStatus.FRESH
+    assert status_resolver.get_status(asset2.key) == StaleStatus.FRESH
+    assert status_resolver.get_status(asset3.key) == StaleStatus.FRESH
+
+
+def test_stale_status_manually_versioned(persistent_instance) -> None:
     @asset(config_schema={"value": Field(int)})
     def asset1(context):
         value = context.op_config["value"]
@@ -623,50 +709,48 @@ def asset2(context, asset1):
         return Output(value, logical_version=LogicalVersion(str(value)))
 
     all_assets = [asset1, asset2]
-    with instance_for_test() as instance:
-        status_resolver = get_stale_status_resolver(instance, all_assets)
-        assert status_resolver.get_status(asset1.key) == StaleStatus.MISSING
-        assert status_resolver.get_status(asset2.key) == StaleStatus.MISSING
-
-        materialize_assets(
-            [asset1, asset2],
-            instance=instance,
-            run_config={
-                "ops": {"asset1": {"config": {"value": 1}}, "asset2": {"config": {"value": 1}}}
-            },
-        )
-        status_resolver = get_stale_status_resolver(instance, all_assets)
-        assert status_resolver.get_status(asset1.key) == StaleStatus.FRESH
-        assert status_resolver.get_status(asset2.key) == StaleStatus.FRESH
-
-        materialize_asset(
-            [asset1],
-            asset1,
-            instance=instance,
-            run_config={"ops": {"asset1": {"config": {"value": 2}}}},
-        )
-        status_resolver = get_stale_status_resolver(instance, all_assets)
-        assert status_resolver.get_status(asset1.key) == StaleStatus.FRESH
-        assert status_resolver.get_status(asset2.key) == StaleStatus.STALE
-        assert status_resolver.get_status_causes(asset2.key) == [
-            StaleStatusCause(StaleStatus.STALE, asset2.key, "updated input", asset1.key),
-        ]
-
-        # rematerialize with the old value, asset2 should be fresh again
-        materialize_asset(
-            [asset1],
-            asset1,
-            instance=instance,
-            run_config={"ops": {"asset1": {"config": {"value": 1}}}},
-        )
-        status_resolver = get_stale_status_resolver(instance, all_assets)
-        assert status_resolver.get_status(asset1.key) == StaleStatus.FRESH
-        assert status_resolver.get_status(asset2.key) == StaleStatus.FRESH
+    asset_graph = AssetGraph.from_assets(all_assets)
+    status_resolver = get_stale_status_resolver(persistent_instance, asset_graph)
+    assert status_resolver.get_status(asset1.key) == StaleStatus.MISSING
+    assert status_resolver.get_status(asset2.key) == StaleStatus.MISSING
 
+    materialize_assets(
+        [asset1, asset2],
+        instance=persistent_instance,
+        run_config={
+            "ops": {"asset1": {"config": {"value": 1}}, "asset2": {"config": {"value": 1}}}
+        },
+    )
+    status_resolver = get_stale_status_resolver(persistent_instance, asset_graph)
+    assert status_resolver.get_status(asset1.key) == StaleStatus.FRESH
+    assert status_resolver.get_status(asset2.key) == StaleStatus.FRESH
+
+    materialize_asset(
+        [asset1],
+        asset1,
+        instance=persistent_instance,
+        run_config={"ops": {"asset1": {"config": {"value": 2}}}},
+    )
+    status_resolver = get_stale_status_resolver(persistent_instance, asset_graph)
+    assert status_resolver.get_status(asset1.key) == StaleStatus.FRESH
+    assert status_resolver.get_status(asset2.key) == StaleStatus.STALE
+    assert status_resolver.get_status_causes(asset2.key) == [
+        StaleStatusCause(StaleStatus.STALE, asset2.key, "updated input", asset1.key),
+    ]
+
+    # rematerialize with the old value, asset2 should be fresh again
+    materialize_asset(
+        [asset1],
+        asset1,
+        instance=persistent_instance,
+        run_config={"ops": {"asset1": {"config": {"value": 1}}}},
+    )
+    status_resolver = get_stale_status_resolver(persistent_instance, asset_graph)
+    assert status_resolver.get_status(asset1.key) == StaleStatus.FRESH
+    assert status_resolver.get_status(asset2.key) == StaleStatus.FRESH
 
-def test_get_logical_version_provenance_inside_op():
-    instance = DagsterInstance.ephemeral()
 
+def test_get_logical_version_provenance_inside_op(instance):
     @asset
     def asset1():
         return Output(1, logical_version=LogicalVersion("foo"))